@@ -10,56 +10,54 @@ while ensuring the container can still:
 4. Handle form submissions and file writing
 """
 
+import docker
+import hashlib
 import json
-import subprocess
+import queue
+import re
 import time
 import requests
 import sys
-import os
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from docker.models.containers import Container
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Iterable, NamedTuple, Set, Tuple
 
 # Verbose flag for detailed output
 VERBOSE = True
 
+# Number of candidate containers tested concurrently, each on its own host port
+MAX_WORKERS = 8
+BASE_PORT = 5000
+
+# Seconds between container inspections while waiting for the server to answer
+LIVENESS_CHECK_INTERVAL = 1.0
+
+# Append-only log of per-syscall decisions, so an interrupted run can resume
+CACHE_PATH = ".seccomp_cache.jsonl"
+
+# The Docker client and the HTTP session below are shared by all worker
+# threads. Workers never change their settings, cookies or adapters, and
+# the urllib3 connection pools behind them are thread-safe, so sharing
+# only means sharing keep-alive connections.
+
+# One Docker API client, reusing its socket connections
+DOCKER_CLIENT = docker.from_env(max_pool_size=MAX_WORKERS * 2)
+
+# One HTTP session with a keep-alive pool per worker port
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS))
+HTTP_SESSION.headers.update({"Connection": "keep-alive"})
+
 def log(message: str):
     """Print verbose messages if enabled."""
     if VERBOSE:
         print(f"[INFO] {message}")
 
 def stop_all_containers():
-    """Stop and remove all running Docker containers."""
-    log("Stopping all running Docker containers...")
-    try:
-        # Get list of running containers
-        result = subprocess.run(
-            ["docker", "ps", "-q"], 
-            capture_output=True, 
-            text=True
-        )
-        
-        if result.stdout.strip():
-            container_ids = result.stdout.strip().split('\n')
-            log(f"Found {len(container_ids)} running containers")
-            
-            # Stop all containers
-            subprocess.run(
-                ["docker", "stop"] + container_ids,
-                check=True,
-                capture_output=True
-            )
-            log("All containers stopped successfully")
-            
-            # Remove all containers
-            subprocess.run(
-                ["docker", "rm"] + container_ids,
-                check=True,
-                capture_output=True
-            )
-            log("All containers removed successfully")
-        else:
-            log("No running containers found")
-    except subprocess.CalledProcessError as e:
-        log(f"Warning: Failed to stop/remove containers: {e}")
+    """Stop and remove all running flask:0.0.3 containers, leaving unrelated ones alone."""
+    log("Stopping all running flask:0.0.3 containers...")
+    stop_container()
 
 def load_seccomp_profile(filepath: str) -> Dict[str, Any]:
     """Load seccomp profile from JSON file."""
@@ -73,96 +71,263 @@ def save_seccomp_profile(profile: Dict[str, Any], filepath: str):
     with open(filepath, 'w') as f:
         json.dump(profile, f, indent=2)
 
-def get_all_syscalls(profile: Dict[str, Any]) -> List[str]:
-    """Extract all system call names from the seccomp profile."""
-    syscalls = []
-    for syscall_group in profile.get('syscalls', []):
-        syscalls.extend(syscall_group.get('names', []))
-    return sorted(list(set(syscalls)))
+def get_cache_key(profile: Dict[str, Any]) -> str:
+    """Identify the image and default profile that cached decisions were made for."""
+    image_id = DOCKER_CLIENT.images.get("flask:0.0.3").id
+    profile_hash = hashlib.sha256(json.dumps(profile, sort_keys=True).encode()).hexdigest()
+    return f"{image_id}:{profile_hash}"
 
-def remove_syscall_from_profile(profile: Dict[str, Any], syscall_name: str) -> Dict[str, Any]:
-    """Create a new profile with the specified syscall removed."""
-    new_profile = json.loads(json.dumps(profile))  # Deep copy
-    
-    # Remove syscall from all syscall groups
-    for syscall_group in new_profile.get('syscalls', []):
-        if 'names' in syscall_group and syscall_name in syscall_group['names']:
-            syscall_group['names'].remove(syscall_name)
-            # If the group is now empty, we might want to remove it
-            # But we'll keep it for now to maintain structure
-    
+def load_cache(cache_key: str) -> Dict[str, bool]:
+    """Load the cached decisions for cache_key, mapping each syscall to whether it is necessary."""
+    decisions: Dict[str, bool] = {}
+    try:
+        with open(CACHE_PATH, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a partial last line
+                    continue
+                if record.get('key') == cache_key:
+                    decisions[record['syscall']] = record['necessary']
+    except FileNotFoundError:
+        pass
+    return decisions
+
+def clear_cache(cache_key: str):
+    """Rewrite the cache file without the decisions recorded for cache_key."""
+    try:
+        with open(CACHE_PATH, 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return
+    kept = []
+    for line in lines:
+        try:
+            if json.loads(line).get('key') == cache_key:
+                continue
+        except json.JSONDecodeError:
+            continue
+        kept.append(line)
+    with open(CACHE_PATH, 'w') as f:
+        f.writelines(kept)
+
+def record_decisions(cache_key: Optional[str], syscalls: Iterable[str], necessary: bool):
+    """Append decisions to the cache file as soon as they are made."""
+    if cache_key is None:
+        return
+    with open(CACHE_PATH, 'a') as f:
+        for syscall in syscalls:
+            f.write(json.dumps({"key": cache_key, "syscall": syscall, "necessary": necessary}) + "\n")
+
+def get_all_syscalls(profile: Dict[str, Any]) -> Tuple[List[str], Dict[str, List[int]]]:
+    """
+    Extract all system call names from the seccomp profile.
+    Returns the sorted names along with a map from each name to the indexes
+    of the syscall groups it appears in.
+    """
+    locations: Dict[str, List[int]] = {}
+    for group_index, syscall_group in enumerate(profile.get('syscalls', [])):
+        for syscall_name in syscall_group.get('names', []):
+            locations.setdefault(syscall_name, []).append(group_index)
+    return sorted(locations), locations
+
+def remove_syscalls_from_profile(profile: Dict[str, Any], syscall_names: Iterable[str]) -> Dict[str, Any]:
+    """Create a new profile with all the specified syscalls removed.
+
+    Only the syscall groups and their names lists are copied; everything
+    else is shared with the original profile.
+    """
+    removed = set(syscall_names)
+    new_profile = dict(profile)
+    new_profile['syscalls'] = [
+        # Emptied groups are kept to maintain structure
+        {**syscall_group, 'names': [n for n in syscall_group['names'] if n not in removed]}
+        if 'names' in syscall_group else syscall_group
+        for syscall_group in profile.get('syscalls', [])
+    ]
     return new_profile
 
-def run_container_with_profile(profile_path: str, timeout: int = 30) -> bool:
+class ProfileTemplate(NamedTuple):
+    """A profile pre-serialized around the names list of each syscall group."""
+    parts: List[str]
+    group_indexes: List[int]
+    names: List[List[str]]
+    names_json: List[str]
+    locations: Dict[str, List[int]]
+
+NAMES_PLACEHOLDER = "__SECCOMP_NAMES__"
+
+# Test profiles are only read by Docker, so they are written without whitespace
+COMPACT_SEPARATORS = (',', ':')
+
+# Capabilities Docker grants a container by default, which test containers run with
+DEFAULT_CAPABILITIES = {
+    "CAP_AUDIT_WRITE", "CAP_CHOWN", "CAP_DAC_OVERRIDE", "CAP_FOWNER", "CAP_FSETID",
+    "CAP_KILL", "CAP_MKNOD", "CAP_NET_BIND_SERVICE", "CAP_NET_RAW", "CAP_SETFCAP",
+    "CAP_SETGID", "CAP_SETPCAP", "CAP_SETUID", "CAP_SYS_CHROOT",
+}
+
+def group_applies(syscall_group: Dict[str, Any], arch: str, capabilities: Set[str]) -> bool:
+    """Check whether Docker would compile a syscall group into the filter.
+
+    Mirrors the daemon's includes/excludes matching on architecture and capabilities.
     """
-    Run the container with the given seccomp profile.
-    Returns True if successful, False otherwise.
+    includes = syscall_group.get('includes', {})
+    excludes = syscall_group.get('excludes', {})
+    if includes.get('arches') and arch not in includes['arches']:
+        return False
+    if includes.get('caps') and not set(includes['caps']) <= capabilities:
+        return False
+    if arch in excludes.get('arches', []):
+        return False
+    if capabilities & set(excludes.get('caps', [])):
+        return False
+    return True
+
+def prune_profile(profile: Dict[str, Any], arch: str,
+                  capabilities: Set[str] = DEFAULT_CAPABILITIES) -> Dict[str, Any]:
+    """Create a profile without the syscall groups Docker would ignore for a test container.
+
+    The resulting filter is the same, but the daemon has less JSON to parse
+    and fewer rules to consider on every container start.
     """
-    log(f"Testing container with profile: {profile_path}")
+    new_profile = dict(profile)
+    new_profile['syscalls'] = [
+        syscall_group
+        for syscall_group in profile.get('syscalls', [])
+        if group_applies(syscall_group, arch, capabilities)
+    ]
+    return new_profile
+
+def build_profile_template(profile: Dict[str, Any], locations: Dict[str, List[int]]) -> ProfileTemplate:
+    """
+    Serialize the profile compactly once, leaving a placeholder for every names list.
+    locations is the syscall to group indexes map returned by get_all_syscalls.
+    """
+    skeleton = dict(profile)
+    skeleton['syscalls'] = [
+        {**syscall_group, 'names': NAMES_PLACEHOLDER} if 'names' in syscall_group else syscall_group
+        for syscall_group in profile.get('syscalls', [])
+    ]
+    group_indexes = [
+        group_index
+        for group_index, syscall_group in enumerate(profile.get('syscalls', []))
+        if 'names' in syscall_group
+    ]
+    names = [profile['syscalls'][group_index]['names'] for group_index in group_indexes]
+    return ProfileTemplate(
+        parts=json.dumps(skeleton, separators=COMPACT_SEPARATORS).split(json.dumps(NAMES_PLACEHOLDER)),
+        group_indexes=group_indexes,
+        names=names,
+        names_json=[json.dumps(group_names, separators=COMPACT_SEPARATORS) for group_names in names],
+        locations=locations
+    )
+
+def render_profile(template: ProfileTemplate, removed: Set[str]) -> str:
+    """Render the template as JSON with the removed syscalls left out.
+
+    Only the names lists of groups that actually lose a syscall are serialized again.
+    """
+    touched = {
+        group_index
+        for syscall_name in removed
+        for group_index in template.locations.get(syscall_name, [])
+    }
+    pieces = [template.parts[0]]
+    for i, group_index in enumerate(template.group_indexes):
+        if group_index in touched:
+            pieces.append(json.dumps([n for n in template.names[i] if n not in removed],
+                                     separators=COMPACT_SEPARATORS))
+        else:
+            pieces.append(template.names_json[i])
+        pieces.append(template.parts[i + 1])
+    return "".join(pieces)
+
+def security_options(profile_json: str, apparmor_profile: str = "apparmor-flask") -> List[str]:
+    """Build the security options for a test container.
+
+    Unlike the docker CLI, the API takes the seccomp profile contents
+    rather than a path, so test profiles never have to touch the disk.
+    """
+    return [f"seccomp={profile_json}", f"apparmor={apparmor_profile}"]
+
+def run_container_with_profile(profile_json: str, host_port: int = BASE_PORT,
+                               startup_timeout: float = 15, cap_add: Optional[List[str]] = None,
+                               apparmor_profile: str = "apparmor-flask") -> Optional[Container]:
+    """
+    Run the container with the given seccomp profile, publishing port 5000 on host_port.
+    Returns the container once the application responds, None otherwise.
+    """
+    log(f"Testing container on port {host_port}")
     
     try:
         # Run container in background
-        cmd = [
-            "docker", "run", "-d", "--rm",
-            f"--security-opt=seccomp={profile_path}",
-            "--security-opt=apparmor=apparmor-flask",
-            "-p", "5000:5000",
-            "flask:0.0.3"
-        ]
-        
-        log(f"Executing: {' '.join(cmd)}")
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout
+        container = DOCKER_CLIENT.containers.run(
+            "flask:0.0.3",
+            security_opt=security_options(profile_json, apparmor_profile),
+            cap_add=cap_add,
+            ports={"5000/tcp": host_port},
+            auto_remove=True,
+            detach=True
         )
+        log(f"Container started with ID: {container.short_id}")
         
-        if result.returncode != 0:
-            log(f"Container failed to start: {result.stderr}")
-            return False
-            
-        container_id = result.stdout.strip()
-        log(f"Container started with ID: {container_id}")
-        
-        # Wait a bit for the container to initialize
-        time.sleep(5)
-        
-        # Check if container is still running
-        inspect_result = subprocess.run(
-            ["docker", "inspect", container_id],
-            capture_output=True,
-            text=True
-        )
+        # Poll until the application answers; a responding server also
+        # proves the container is running, so the container is only
+        # inspected while nothing answers yet
+        url = f"http://localhost:{host_port}/"
+        deadline = time.monotonic() + startup_timeout
+        ready = False
+        next_liveness_check = time.monotonic() + LIVENESS_CHECK_INTERVAL
+        while time.monotonic() < deadline:
+            try:
+                # Any answer settles it: a server that responds with an
+                # error will not recover by waiting longer
+                status_code = HTTP_SESSION.get(url, timeout=0.5).status_code
+                if status_code == 200:
+                    ready = True
+                else:
+                    log(f"Main page failed with status {status_code}")
+                break
+            except requests.exceptions.RequestException:
+                pass
+            # A container that died during startup will never answer; the
+            # HTTP poll is the fast path, so only inspect it now and then
+            if time.monotonic() >= next_liveness_check:
+                next_liveness_check = time.monotonic() + LIVENESS_CHECK_INTERVAL
+                try:
+                    container.reload()
+                except docker.errors.NotFound:
+                    log("Container exited and was removed")
+                    return None
+                if container.status != "running":
+                    log(f"Container is {container.status}")
+                    break
+            time.sleep(0.1)
+        else:
+            log(f"Container did not become ready within {startup_timeout}s")
         
-        if inspect_result.returncode != 0:
-            log("Failed to inspect container")
-            return False
-            
-        container_info = json.loads(inspect_result.stdout)
-        if not container_info[0]['State']['Running']:
-            log("Container is not running")
+        if not ready:
             # Get logs to see what went wrong
-            logs_result = subprocess.run(
-                ["docker", "logs", container_id],
-                capture_output=True,
-                text=True
-            )
-            if logs_result.returncode == 0:
-                log(f"Container logs: {logs_result.stdout}")
-            return False
+            try:
+                log(f"Container logs: {container.logs().decode(errors='replace')}")
+            except docker.errors.NotFound:
+                pass
+            stop_container(container)
+            return None
             
         log("Container is running")
-        return True
+        return container
         
-    except subprocess.TimeoutExpired:
-        log("Container start timed out")
-        return False
+    except docker.errors.APIError as e:
+        log(f"Container failed to start: {e}")
+        return None
     except Exception as e:
         log(f"Error running container: {e}")
-        return False
+        return None
 
-def test_web_functionality() -> bool:
+def test_web_functionality(base_url: str = f"http://localhost:{BASE_PORT}") -> bool:
     """
     Test if the web application is functioning correctly.
     Returns True if all tests pass, False otherwise.
@@ -172,7 +337,7 @@ def test_web_functionality() -> bool:
     try:
         # Test 1: Check if the main page loads
         log("Testing main page access...")
-        response = requests.get("http://localhost:5000/", timeout=10)
+        response = HTTP_SESSION.get(f"{base_url}/", timeout=10)
         if response.status_code != 200:
             log(f"Main page failed with status {response.status_code}")
             return False
@@ -180,8 +345,8 @@ def test_web_functionality() -> bool:
         
         # Test 2: Test form submission
         log("Testing form submission...")
-        response = requests.post(
-            "http://localhost:5000/write",
+        response = HTTP_SESSION.post(
+            f"{base_url}/write",
             data={"content": "test_content"},
             timeout=10
         )
@@ -192,8 +357,8 @@ def test_web_functionality() -> bool:
         
         # Test 3: Test API endpoint
         log("Testing API endpoint...")
-        response = requests.post(
-            "http://localhost:5000/api/write",
+        response = HTTP_SESSION.post(
+            f"{base_url}/api/write",
             json={"text": "api_test_content"},
             headers={"Content-Type": "application/json"},
             timeout=10
@@ -212,87 +377,266 @@ def test_web_functionality() -> bool:
         log(f"Unexpected error during web testing: {e}")
         return False
 
-def stop_container():
-    """Stop the test container."""
+def record_syscalls(profile_json: str, timeout: float = 15) -> Set[str]:
+    """
+    Record the syscalls the running application makes while serving the web tests.
+
+    strace (installed in the image) is attached to the server inside a container
+    started with the given profile, so syscalls made only during startup are not
+    seen. Returns the observed syscall names, or an empty set if recording fails.
+    """
+    log("Recording syscalls used by the application...")
+    # strace needs ptrace, which the apparmor-flask profile does not grant
+    container = run_container_with_profile(
+        profile_json,
+        cap_add=["SYS_PTRACE"],
+        apparmor_profile="unconfined"
+    )
+    if container is None:
+        log("Warning: Failed to start container for syscall recording")
+        return set()
+    
     try:
-        # Find and stop the container
-        result = subprocess.run(
-            ["docker", "ps", "-q", "--filter", "ancestor=flask:0.0.3"],
-            capture_output=True,
-            text=True
-        )
+        # Start strace in the background and wait, in the same exec, until the
+        # server reports a tracer, so no traffic is sent before it is attached
+        result = container.exec_run([
+            "sh", "-c",
+            "strace -f -c -e trace=all -o /tmp/strace.out -p 1 </dev/null >/dev/null 2>&1 & "
+            f"for i in $(seq {int(timeout * 10)}); do "
+            "grep -q '^TracerPid:[[:space:]]*[1-9]' /proc/1/status && exit 0; sleep 0.1; "
+            "done; "
+            "exit 1"
+        ])
+        if result.exit_code != 0:
+            log(f"Warning: strace did not attach within {timeout}s")
+            return set()
+        if not test_web_functionality():
+            log("Warning: Web functionality test failed while recording syscalls")
+            return set()
         
-        if result.stdout.strip():
-            container_ids = result.stdout.strip().split('\n')
-            for container_id in container_ids:
-                subprocess.run(
-                    ["docker", "stop", container_id],
-                    capture_output=True
-                )
-                log(f"Stopped container {container_id}")
+        # strace writes its summary table when interrupted; stopping it, waiting
+        # for the summary and reading it happen in a single exec
+        result = container.exec_run([
+            "sh", "-c",
+            "pkill -INT strace; "
+            f"for i in $(seq {int(timeout * 10)}); do "
+            "grep -q total /tmp/strace.out 2>/dev/null && break; sleep 0.1; "
+            "done; "
+            "cat /tmp/strace.out"
+        ])
+        output = result.output.decode(errors="replace")
+        if "total" not in output:
+            log("Warning: strace did not produce a summary")
+            return set()
+        
+        syscalls = set()
+        for line in output.splitlines():
+            for name in re.findall(r'\s(\w+)\s*$', line):
+                if name not in ("syscall", "total"):
+                    syscalls.add(name)
+        log(f"Observed {len(syscalls)} syscalls")
+        return syscalls
+    except docker.errors.APIError as e:
+        log(f"Warning: Failed to record syscalls: {e}")
+        return set()
+    finally:
+        stop_container(container)
+
+def stop_container(container: Optional[Container] = None):
+    """Stop the given test container, or every flask:0.0.3 container if none is given."""
+    try:
+        if container is not None:
+            containers = [container]
+        else:
+            # Find the containers of our image; not filtered on the published
+            # port, since parallel workers use a range of ports
+            containers = DOCKER_CLIENT.containers.list(filters={"ancestor": "flask:0.0.3"})
+        
+        # Test containers are disposable, so kill and remove them in one
+        # call instead of waiting for a graceful stop
+        for container in containers:
+            try:
+                container.remove(force=True)
+                log(f"Stopped container {container.short_id}")
+            except docker.errors.NotFound:
+                pass
+            except docker.errors.APIError as e:
+                # Auto-removed containers can already be on their way out (409)
+                log(f"Warning: Failed to remove container {container.short_id}: {e}")
     except Exception as e:
         log(f"Error stopping container: {e}")
 
+def check_profile(profile_json: str, label: str, free_ports: queue.Queue) -> bool:
+    """
+    Run one candidate container with the rendered profile on a free host port and probe it.
+    Returns True if the application still works, False otherwise.
+    """
+    container = None
+    port = None
+    try:
+        port = free_ports.get()
+        container = run_container_with_profile(profile_json, port)
+        if container is None:
+            log(f"Without {label} the container does not start")
+            return False
+        if not test_web_functionality(f"http://localhost:{port}"):
+            log(f"Without {label} the web functionality breaks")
+            return False
+        return True
+    except Exception as e:
+        log(f"Error testing without {label}: {e}")
+        return False
+    finally:
+        if container is not None:
+            stop_container(container)
+        if port is not None:
+            free_ports.put(port)
+
+def try_remove_subset(template: ProfileTemplate, removed: Set[str], subset: List[str],
+                      free_ports: queue.Queue) -> bool:
+    """Return True if all syscalls in subset can be removed at once on top of removed."""
+    label = subset[0] if len(subset) == 1 else f"{subset[0]}+{len(subset) - 1}"
+    return check_profile(render_profile(template, removed | set(subset)), label, free_ports)
+
+def ddmin(template: ProfileTemplate, removed: Set[str], candidates: List[str], necessary_syscalls: set,
+          free_ports: queue.Queue, executor: ThreadPoolExecutor,
+          cache_key: Optional[str] = None) -> Set[str]:
+    """
+    Remove as many candidates from the profile as possible by delta debugging.
+
+    Subsets are tested with all their syscalls removed at once; a subset that
+    breaks the application is split in half and its halves are tested in the
+    next round, until single necessary syscalls remain. All subsets of a round
+    are tested in parallel against the same baseline profile.
+    Returns the set of removed syscalls, starting from the already removed
+    ones, and adds the necessary syscalls to necessary_syscalls. Every decision
+    is also written to the cache under cache_key, if given.
+    """
+    # Start with one subset per worker: removing every candidate at once never works
+    chunk_size = max(1, -(-len(candidates) // MAX_WORKERS))
+    pending = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    round_number = 0
+    while pending:
+        round_number += 1
+        log(f"Round {round_number}: testing {len(pending)} subsets "
+            f"({sum(len(subset) for subset in pending)} syscalls)")
+        
+        futures = {
+            executor.submit(try_remove_subset, template, removed, subset, free_ports): subset
+            for subset in pending
+        }
+        removable_subsets = []
+        failed_subsets = []
+        try:
+            for future in as_completed(futures):
+                subset = futures[future]
+                if future.result():
+                    log(f"Subset {subset[0]}..{subset[-1]} ({len(subset)}) is NOT necessary - can be removed")
+                    removable_subsets.append(subset)
+                else:
+                    failed_subsets.append(subset)
+        except BaseException:
+            # A round can queue many more tests than there are workers; on
+            # Ctrl-C only the running ones should finish, not the whole round
+            for future in futures:
+                future.cancel()
+            raise
+        
+        # Each subset was removable on its own, but removing them together may
+        # still break the application, so check the combined profile once
+        combined = removed.union(*removable_subsets)
+        if len(removable_subsets) == 1:
+            removed = combined
+            record_decisions(cache_key, removable_subsets[0], False)
+        elif removable_subsets:
+            if check_profile(render_profile(template, combined), "combined", free_ports):
+                removed = combined
+                for subset in removable_subsets:
+                    record_decisions(cache_key, subset, False)
+            else:
+                # Fall back to re-verifying the removals one subset at a time;
+                # the first one already passed against this same baseline
+                log("Combined profile failed, re-verifying removals sequentially")
+                removed = removed | set(removable_subsets[0])
+                record_decisions(cache_key, removable_subsets[0], False)
+                for subset in removable_subsets[1:]:
+                    if try_remove_subset(template, removed, subset, free_ports):
+                        removed = removed | set(subset)
+                        record_decisions(cache_key, subset, False)
+                    else:
+                        failed_subsets.append(subset)
+        
+        pending = []
+        for subset in failed_subsets:
+            if len(subset) == 1:
+                log(f"Syscall {subset[0]} is necessary")
+                necessary_syscalls.add(subset[0])
+                record_decisions(cache_key, subset, True)
+            else:
+                middle = len(subset) // 2
+                pending.extend([subset[:middle], subset[middle:]])
+    
+    return removed
+
 def minimize_seccomp_profile():
     """Main function to minimize the seccomp profile."""
     log("Starting seccomp profile minimization...")
     
-    # Stop all containers first
+    # Stop leftover containers of the image first
     stop_all_containers()
     
     # Load the default profile (permissive)
     default_profile = load_seccomp_profile("seccomp-default.json")
     
-    # Create initial working profile (copy of default)
-    working_profile = json.loads(json.dumps(default_profile))
+    # Create initial working profile (same as default)
     working_profile_path = "seccomp.json"
-    save_seccomp_profile(working_profile, working_profile_path)
+    save_seccomp_profile(default_profile, working_profile_path)
+    
+    # Test profiles only keep the rules that apply on the daemon's architecture,
+    # and are rendered from a template instead of re-serializing the whole
+    # profile for every candidate
+    test_base_profile = prune_profile(default_profile, DOCKER_CLIENT.version()["Arch"])
+    all_syscalls, locations = get_all_syscalls(test_base_profile)
+    template = build_profile_template(test_base_profile, locations)
     
-    # Get all syscalls
-    all_syscalls = get_all_syscalls(working_profile)
-    log(f"Found {len(all_syscalls)} system calls to test")
+    # Syscalls only allowed by ignored rules can be removed without testing
+    inert_syscalls = set(get_all_syscalls(default_profile)[0]) - set(all_syscalls)
+    
+    # Syscalls the application is seen making are necessary without testing;
+    # recording needs CAP_SYS_PTRACE, so it runs with the full default profile
+    observed_syscalls = record_syscalls(json.dumps(default_profile, separators=COMPACT_SEPARATORS))
     
     # List of syscalls we've determined are necessary
-    necessary_syscalls = set()
+    necessary_syscalls = set(all_syscalls) & observed_syscalls
+    all_syscalls = sorted(set(all_syscalls) - observed_syscalls)
     
-    # Test each syscall
-    for i, syscall in enumerate(all_syscalls):
-        log(f"Testing syscall {i+1}/{len(all_syscalls)}: {syscall}")
-        
-        # Create a profile without this syscall
-        test_profile = remove_syscall_from_profile(working_profile, syscall)
-        test_profile_path = f"seccomp_test_{syscall}.json"
-        save_seccomp_profile(test_profile, test_profile_path)
-        
-        try:
-            # Stop any existing container
-            stop_container()
-            
-            # Test the profile
-            if run_container_with_profile(test_profile_path):
-                # If container starts, test web functionality
-                if test_web_functionality():
-                    log(f"Syscall {syscall} is NOT necessary - can be removed")
-                    # Update working profile to remove this syscall
-                    working_profile = test_profile
-                    save_seccomp_profile(working_profile, working_profile_path)
-                else:
-                    log(f"Syscall {syscall} is necessary for web functionality")
-                    necessary_syscalls.add(syscall)
-            else:
-                log(f"Syscall {syscall} is necessary for container startup")
-                necessary_syscalls.add(syscall)
-                
-        except Exception as e:
-            log(f"Error testing syscall {syscall}: {e}")
-            necessary_syscalls.add(syscall)
-        finally:
-            # Stop container and clean up test profile
-            stop_container()
-            try:
-                os.remove(test_profile_path)
-            except:
-                pass
+    # Each worker owns one host port while its container is running
+    free_ports = queue.Queue()
+    for port in range(BASE_PORT, BASE_PORT + MAX_WORKERS):
+        free_ports.put(port)
+    
+    # Resume from the decisions of previous runs on the same image and profile
+    cache_key = get_cache_key(default_profile)
+    cached = load_cache(cache_key)
+    cached_removed = {syscall for syscall in all_syscalls if cached.get(syscall) is False}
+    if cached_removed and not check_profile(render_profile(template, inert_syscalls | cached_removed),
+                                            "cached", free_ports):
+        # Drop the stale records, otherwise they would mix with this run's
+        # decisions and fail the same check on the next run
+        log("Cached removals no longer work, clearing the cache")
+        clear_cache(cache_key)
+        cached, cached_removed = {}, set()
+    necessary_syscalls |= {syscall for syscall in all_syscalls if cached.get(syscall) is True}
+    all_syscalls = [syscall for syscall in all_syscalls if syscall not in cached]
+    log(f"Found {len(all_syscalls)} system calls to test "
+        f"({len(necessary_syscalls)} observed in use or cached as necessary, "
+        f"{len(cached_removed)} cached as removable, {len(inert_syscalls)} never applied)")
+    
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        removed_syscalls = ddmin(template, inert_syscalls | cached_removed, all_syscalls,
+                                 necessary_syscalls, free_ports, executor, cache_key)
+    working_profile = remove_syscalls_from_profile(default_profile, removed_syscalls)
+    save_seccomp_profile(working_profile, working_profile_path)
     
     # Final cleanup
     stop_container()